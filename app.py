@@ -1,32 +1,88 @@
 from flask import Flask, render_template, request, redirect, url_for
-import json
 import os
-import glob
 from datetime import date
 
+from src import json_utils
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret-key-here'  # For session management if needed
 
 def get_latest_file():
     # Look for scored articles files in the "data/scored" folder.
-    files = glob.glob("data/scored/generated_scored_articles_*.json")
-    if files:
-        files.sort()  # Assumes filename contains the date in sortable format YYYY-MM-DD.
-        return files[-1]
+    scored_dir = "data/scored"
+    try:
+        with os.scandir(scored_dir) as it:
+            # Assumes filename contains the date in sortable format YYYY-MM-DD.
+            latest = max(
+                (e.name for e in it
+                 if e.name.startswith("generated_scored_articles_") and e.name.endswith(".json")),
+                default=None
+            )
+    except FileNotFoundError:
+        latest = None
+    if latest:
+        return os.path.join(scored_dir, latest)
     return "data/generated_scored_articles.json"
 
 DATA_PATH = get_latest_file()
 
+def get_feedback_file(data_path):
+    # Pair the feedback log with the date of the scored file being reviewed.
+    name = os.path.basename(data_path)
+    prefix = "generated_scored_articles_"
+    if name.startswith(prefix) and name.endswith(".json"):
+        date_str = name[len(prefix):-len(".json")]
+    else:
+        date_str = date.today().strftime("%Y-%m-%d")
+    return os.path.join(os.path.dirname(data_path), f"user_feedback_{date_str}.jsonl")
+
+FEEDBACK_PATH = get_feedback_file(DATA_PATH)
+
+# In-process cache of the articles list, keyed on the file's modification time.
+_ARTICLES_CACHE = None
+_ARTICLES_MTIME = None
+
+def apply_feedback(articles):
+    """Replay any user scores logged since the articles file was last finalized."""
+    if not os.path.exists(FEEDBACK_PATH):
+        return
+    with open(FEEDBACK_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json_utils.loads(line)
+            index = entry["index"]
+            if 0 <= index < len(articles):
+                articles[index]['user_score'] = entry["user_score"]
+                articles[index]['user_reasoning'] = entry["user_reasoning"]
+
 def load_articles():
-    """Load the JSON articles from the file."""
-    with open(DATA_PATH, 'r', encoding='utf-8') as f:
-        articles = json.load(f)
-    return articles
+    """Load the JSON articles from the file, re-parsing only if it changed on disk."""
+    global _ARTICLES_CACHE, _ARTICLES_MTIME
+    mtime = os.stat(DATA_PATH).st_mtime_ns
+    if _ARTICLES_CACHE is None or mtime != _ARTICLES_MTIME:
+        articles = json_utils.load_file(DATA_PATH)
+        apply_feedback(articles)
+        _ARTICLES_CACHE = articles
+        _ARTICLES_MTIME = mtime
+    return _ARTICLES_CACHE
+
+def save_articles(article_index, user_score, user_reasoning):
+    """Append a single user score to the feedback log."""
+    entry = {"index": article_index, "user_score": user_score, "user_reasoning": user_reasoning}
+    with open(FEEDBACK_PATH, 'a', encoding='utf-8', buffering=1) as f:
+        f.write(json_utils.dumps(entry).decode("utf-8") + "\n")
 
-def save_articles(articles):
-    """Save the updated articles list back to the file."""
-    with open(DATA_PATH, 'w', encoding='utf-8') as f:
-        json.dump(articles, f, indent=4, ensure_ascii=False)
+def finalize_articles():
+    """Merge the feedback log into the articles file once and clear the log."""
+    global _ARTICLES_MTIME
+    if not os.path.exists(FEEDBACK_PATH):
+        return
+    articles = load_articles()
+    json_utils.dump_file(articles, DATA_PATH)
+    # Our own write should not invalidate the cache.
+    _ARTICLES_MTIME = os.stat(DATA_PATH).st_mtime_ns
+    os.remove(FEEDBACK_PATH)
 
 @app.route('/')
 def index():
@@ -57,16 +113,15 @@ def article(article_index):
         article_data['user_score'] = user_score
         article_data['user_reasoning'] = user_reasoning
         
-        # Save the updated article back into the articles list and persist the changes.
-        articles[article_index] = article_data
-        save_articles(articles)
+        # The cached list stays authoritative; only the new score is appended to disk.
+        save_articles(article_index, user_score, user_reasoning)
         
         # Move to the next article
         next_index = article_index + 1
         return redirect(url_for('article', article_index=next_index))
     
-    # Calculate a progress percentage for the progress bar.
-    progress = ((article_index) / total_articles) * 100
+    # Calculate a whole-number progress percentage for the progress bar width.
+    progress = article_index * 100 // total_articles
 
     return render_template('article.html', 
                            article=article_data, 
@@ -76,6 +131,7 @@ def article(article_index):
 
 @app.route('/completed')
 def completed():
+    finalize_articles()
     return render_template('completed.html')
 
 if __name__ == '__main__':
@@ -9,6 +9,21 @@ from src.gdelt_pipeline import fetch_gdelt_articles, save_articles_to_file
 from src.rl_agent import run_simulation
 from src import prompt_agent  # Import the prompt_agent module
 
+def enable_llm_cache():
+    # Optionally cache Gemini responses in SQLite so identical prompts (e.g. re-running
+    # the agent on the same articles during development) skip the API call.
+    cache_path = os.getenv("LLM_CACHE_PATH")
+    if not cache_path:
+        return
+    try:
+        from langchain.globals import set_llm_cache
+        from langchain_community.cache import SQLiteCache
+    except ImportError:
+        logging.warning("LLM_CACHE_PATH is set but langchain-community is not installed; LLM cache disabled.")
+        return
+    set_llm_cache(SQLiteCache(database_path=cache_path))
+    logging.info("LLM response cache enabled at %s", cache_path)
+
 def run_extract(args):
     config_path = args.config or "config/gdelt_config.json"
     # Load GDELT configuration from file
@@ -37,7 +52,6 @@ def run_web(args):
     app.run(debug=True)
 
 def run_prompt_update(args):
-    from datetime import date
     today_str = date.today().strftime("%Y-%m-%d")
     # If no generated file provided explicitly, use today's scored file.
     default_generated = f"data/scored/generated_scored_articles_{today_str}.json"
@@ -56,8 +70,7 @@ def run_prompt_update(args):
 
 def run_summary_agent(args):
     from src.summary_agent import run_summary_agent
-    import asyncio
-    asyncio.run(run_summary_agent(input_file=args.input, output_file=args.output))
+    run_summary_agent(input_file=args.input, output_file=args.output)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -94,6 +107,7 @@ def main():
 
     args = parser.parse_args()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    enable_llm_cache()
     
     if args.command == "extract":
         run_extract(args)
@@ -1,28 +1,56 @@
 import os
-import json
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src import json_utils
+
 # Load environment variables from .env
 load_dotenv()
 
-# Set up logging
 LOG_FILENAME = "pipeline.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILENAME),
-        logging.StreamHandler()  # also output to console
-    ]
-)
+
+def _configure_logging():
+    """
+    Set up logging for standalone pipeline runs.
+    Called from main() so importing this module does not open a log file.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler(LOG_FILENAME, delay=True),  # file is created on first emit
+            logging.StreamHandler()  # also output to console
+        ]
+    )
 
 # Get the GDELT API endpoint from environment variables
 GDELT_ENDPOINT = os.getenv("GDELT_API_URL", "http://api.gdeltproject.org/api/v2/doc/doc")
 
+# Shared HTTP session so repeated fetches reuse TCP/TLS connections.
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "User-Agent": "NewsArticleSelectionRL/1.0 (contact: your-email@example.com)",
+    "Accept-Encoding": "gzip, deflate"
+})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False  # Hand the final response back so its status code is logged below.
+    )
+))
+
+# Extracts the title attribute from the HTML anchor tag of a feature.
+_TITLE_RE = re.compile(r'title\s*=\s*"([^"]+)"')
+
 def fetch_gdelt_articles(custom_params=None):
     """
     Query the GDELT API for environmental news articles and process the returned data.
@@ -39,38 +67,38 @@ def fetch_gdelt_articles(custom_params=None):
     if custom_params:
         default_params.update(custom_params)
     params = default_params
-    headers = {
-        "User-Agent": "NewsArticleSelectionRL/1.0 (contact: your-email@example.com)"
-    }
     try:
         logging.info("Sending request to GDELT API with query: %s", params.get("query"))
-        response = requests.get("https://api.gdeltproject.org/api/v2/geo/geo", params=params, timeout=15, headers=headers)
+        response = _SESSION.get("https://api.gdeltproject.org/api/v2/geo/geo", params=params, timeout=15)
         if response.ok:
-            data = response.json()
+            # Parse the raw body directly rather than via requests' text decoding.
+            data = json_utils.loads(response.content)
             logging.info("GDELT API returned successfully.")
             
             processed_articles = []
             # Process GeoJSON features
-            features = data.get("features", [])
+            # Cap client-side too: the GEO endpoint is not guaranteed to honour maxrecords.
+            features = (data.get("features") or [])[:int(params["maxrecords"])]
             if not features:
                 logging.warning("No features found in the response.")
             else:
-                for feature in features[:10]:
+                for feature in features:
                     properties = feature.get("properties", {})
                     geometry = feature.get("geometry", {})
                     html_content = properties.get("html", "")
+                    name_value = properties.get("name", "N/A")
                     title_value = properties.get("title")
                     if not title_value:
                         # Try to extract title from the HTML anchor tag's title attribute
-                        match = re.search(r'title\s*=\s*"([^"]+)"', html_content)
+                        match = _TITLE_RE.search(html_content)
                         if match:
                             title_value = match.group(1)
                         else:
-                            title_value = properties.get("name", "N/A")
+                            title_value = name_value
 
                     processed = {
                         "title": title_value,
-                        "name": properties.get("name", "N/A"),
+                        "name": name_value,
                         "count": properties.get("count", "N/A"),
                         "shareimage": properties.get("shareimage", "N/A"),
                         "html": html_content,
@@ -94,13 +122,13 @@ def save_articles_to_file(articles, filename="data/gdelt_articles.json"):
     try:
         # Ensure the directory exists
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(articles, f, ensure_ascii=False, indent=4)
+        json_utils.dump_file(articles, filename)
         logging.info("Successfully saved articles to %s", filename)
     except Exception as e:
         logging.exception("Failed to save articles to file: %s", str(e))
 
 def main():
+    _configure_logging()
     logging.info("Starting GDELT Data Pipeline")
     articles = fetch_gdelt_articles()
     if articles:
@@ -0,0 +1,46 @@
+"""
+Shared JSON helpers for the pipeline.
+
+Uses orjson when it is installed and falls back to the stdlib json module otherwise.
+Both paths produce the same output: UTF-8 bytes with non-ASCII characters kept as-is,
+compact by default or with 2-space indentation when pretty (orjson only supports 2).
+"""
+
+import json
+
+try:
+    import orjson  # Optional: faster JSON parsing/serialization
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so this catches either parser's errors.
+JSONDecodeError = json.JSONDecodeError
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj, pretty=False):
+    """Serialize obj to UTF-8 JSON bytes."""
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+def load_file(path):
+    """Load a JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+def dump_file(obj, path):
+    """Write obj to path as pretty-printed JSON in a single write."""
+    with open(path, "wb") as f:
+        f.write(dumps(obj, pretty=True))
@@ -1,10 +1,55 @@
 import os
-import json
+import functools
 import logging
+import math
+from decimal import Decimal
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from src import json_utils
+
+try:
+    import ijson  # Streaming JSON parsing for large daily files
+except ImportError:
+    ijson = None
+
+def iter_json_items(path):
+    """Yield the items of a top-level JSON array, streaming with ijson when available."""
+    if ijson is None:
+        yield from json_utils.load_file(path)
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "item")
+
+def _is_num(value):
+    """Return True if value can be converted to a float score."""
+    if isinstance(value, (int, float, Decimal)):
+        return True
+    if isinstance(value, str):
+        try:
+            float(value)
+        except ValueError:
+            return False
+        return True
+    return False
+
+def collect_feedback(articles, human_scores, feedback_entries):
+    """
+    Append the human score and formatted feedback entry of each scored article.
+
+    Returns:
+        int: The number of articles consumed.
+    """
+    count = 0
+    for article in articles:
+        count += 1
+        score = article.get("user_score")
+        if "user_reasoning" in article and _is_num(score):
+            score = float(score)
+            human_scores.append(score)
+            feedback_entries.append(f"Score: {score:.1f} - {article['user_reasoning']}")
+    return count
+
 def improve_prompt(
     generated_json_path="data/generated_scored_articles.json",
     daily_dir=None,
@@ -25,70 +70,72 @@ def improve_prompt(
     Returns:
         bool: True if the prompt was updated successfully, False otherwise.
     """
-    articles = []
+    human_scores = []
+    feedback_entries = []
+    daily_entries = []
     if daily_dir is not None:
+        article_count = 0
         if os.path.isdir(daily_dir):
-            # Aggregate articles from all .json files in daily directory.
-            for filename in os.listdir(daily_dir):
-                if filename.lower().endswith('.json'):
-                    file_path = os.path.join(daily_dir, filename)
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            daily_articles = json.load(f)
-                            articles.extend(daily_articles)
-                    except Exception as e:
-                        logging.exception("Failed to load file %s: %s", filename, str(e))
+            # Aggregate feedback from all .json files in daily directory, streaming each file.
+            with os.scandir(daily_dir) as it:
+                daily_entries = [
+                    e for e in it
+                    if e.is_file(follow_symlinks=False) and e.name.lower().endswith('.json')
+                ]
+            for entry in daily_entries:
+                # Collect into per-file lists so a file that fails partway through is dropped entirely.
+                file_scores = []
+                file_entries = []
+                try:
+                    file_count = collect_feedback(iter_json_items(entry.path), file_scores, file_entries)
+                except Exception as e:
+                    logging.exception("Failed to load file %s: %s", entry.name, str(e))
+                    continue
+                article_count += file_count
+                human_scores.extend(file_scores)
+                feedback_entries.extend(file_entries)
         else:
             logging.error(f"Provided daily_dir {daily_dir} is not a directory.")
-        if not articles:
+        if not article_count:
             logging.info("No daily articles found in %s, falling back to generated_json_path.", daily_dir)
             if os.path.exists(generated_json_path):
                 try:
-                    with open(generated_json_path, "r", encoding="utf-8") as f:
-                        articles = json.load(f)
+                    articles = json_utils.load_file(generated_json_path)
                 except Exception as e:
                     logging.exception(f"Failed to load generated articles: {str(e)}")
                     return False
+                collect_feedback(articles, human_scores, feedback_entries)
             else:
                 logging.error(f"Generated articles file not found: {generated_json_path}")
                 return False
         else:
-            logging.info("Aggregated %d articles from daily directory.", len(articles))
+            logging.info("Aggregated %d articles from daily directory.", article_count)
     else:
         if os.path.exists(generated_json_path):
             try:
-                with open(generated_json_path, "r", encoding="utf-8") as f:
-                    articles = json.load(f)
+                articles = json_utils.load_file(generated_json_path)
             except Exception as e:
                 logging.exception(f"Failed to load generated articles: {str(e)}")
                 return False
+            collect_feedback(articles, human_scores, feedback_entries)
         else:
             logging.error(f"Generated articles file not found: {generated_json_path}")
             return False
-
-    human_scores = []
-    feedback_entries = []
-    for article in articles:
-        if "user_score" in article and "user_reasoning" in article:
-            try:
-                score = float(article["user_score"])
-                human_scores.append(score)
-            except Exception:
-                continue
-            feedback_entries.append(f"Score: {score:.1f} - {article['user_reasoning']}")
     
     if not human_scores:
         logging.info("No human feedback scores available to update prompt.")
         return False
 
-    avg_score = sum(human_scores) / len(human_scores)
+    avg_score = math.fsum(human_scores) / len(human_scores)
     
     # Build a detailed feedback section that includes average score and each feedback entry.
-    feedback_section = "\n\n=== Human Feedback Integration ===\n"
-    feedback_section += f"Average Human Score: {avg_score:.2f}\n"
-    feedback_section += "Detailed Feedback:\n"
-    for entry in feedback_entries:
-        feedback_section += f"{entry}\n"
+    parts = [
+        "\n\n=== Human Feedback Integration ===\n",
+        f"Average Human Score: {avg_score:.2f}\n",
+        "Detailed Feedback:\n",
+    ]
+    parts.extend(f"{entry}\n" for entry in feedback_entries)
+    feedback_section = "".join(parts)
     
     try:
         if os.path.exists(prompt_path):
@@ -99,29 +146,39 @@ def improve_prompt(
         
         # Use the agent to generate an improved prompt that integrates the feedback.
         improved_prompt = agent_improve_prompt(original_prompt, feedback_section)
+        if not improved_prompt:
+            logging.error("Prompt agent returned an empty prompt; keeping %s unchanged.", prompt_path)
+            return False
         
-        with open(prompt_path, "w", encoding="utf-8") as f:
+        # Write to a temporary file and swap it in atomically so a crash never leaves a partial prompt.
+        tmp_path = prompt_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             f.write(improved_prompt)
+        os.replace(tmp_path, prompt_path)
         logging.info("Agent-improved prompt saved to %s", prompt_path)
         # If daily_dir was used, archive the processed files.
-        if daily_dir is not None:
-            archive_dir = os.path.join(os.path.dirname(daily_dir), "processed_daily")
-            if not os.path.exists(archive_dir):
-                os.makedirs(archive_dir)
-            for filename in os.listdir(daily_dir):
-                if filename.lower().endswith('.json'):
-                    src_file = os.path.join(daily_dir, filename)
-                    dest_file = os.path.join(archive_dir, filename)
-                    try:
-                        os.rename(src_file, dest_file)
-                        logging.info("Archived daily file: %s", filename)
-                    except Exception as e:
-                        logging.exception("Failed to archive file %s: %s", filename, str(e))
+        if daily_entries:
+            # normpath so a trailing slash on daily_dir still archives into its sibling folder.
+            archive_dir = os.path.join(os.path.dirname(os.path.normpath(daily_dir)), "processed_daily")
+            os.makedirs(archive_dir, exist_ok=True)
+            # Reuse the entries found during aggregation rather than re-scanning the directory.
+            for entry in daily_entries:
+                dest_file = os.path.join(archive_dir, entry.name)
+                try:
+                    os.rename(entry.path, dest_file)
+                    logging.info("Archived daily file: %s", entry.name)
+                except Exception as e:
+                    logging.exception("Failed to archive file %s: %s", entry.name, str(e))
         return True
     except Exception as e:
         logging.exception(f"Failed to save updated prompt: {str(e)}")
         return False
 
+@functools.lru_cache(maxsize=None)
+def _llm(model="gemini-2.0-flash", temperature=0.7):
+    """Return a shared Gemini client so repeated calls skip client setup."""
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature)
+
 def agent_improve_prompt(original_prompt, feedback_section):
     """
     Use an LLM-based agent to produce an improved version of the original prompt,
@@ -149,18 +206,12 @@ Please output ONLY the revised prompt text with no additional commentary, greeti
 """,
          input_variables=["original_prompt", "feedback_section"]
     )
-    # Instantiate the Gemini-based LLM (using latest LangChain syntax).
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-    raw_response = chain.run({"original_prompt": original_prompt, "feedback_section": feedback_section})
-    # If the response is a dict and contains extra keys (e.g., "text"), extract only the improved prompt text.
-    if isinstance(raw_response, dict):
-         improved_prompt = raw_response.get("text", raw_response)
-    else:
-         improved_prompt = raw_response
-
-    improved_prompt = improved_prompt.strip()
-    return improved_prompt
+    # Reuse the shared Gemini-based LLM client.
+    llm = _llm()
+    chain = prompt_template | llm
+    raw_response = chain.invoke({"original_prompt": original_prompt, "feedback_section": feedback_section})
+    # The chain returns an AIMessage; its content is the improved prompt text.
+    return raw_response.content.strip()
 
 def main():
     import argparse
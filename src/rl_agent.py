@@ -11,46 +11,98 @@ Ensure your environment is set up with your GOOGLE_API_KEY.
 """
 
 import os
-import json
+import html
+import re
 import asyncio
+import functools
 from textwrap import dedent
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from langchain_google_genai import ChatGoogleGenerativeAI
 import logging
-import re
 from pathlib import Path
 from datetime import date
 
+from src import json_utils
+
 try:
     import json5  # For more forgiving JSON parsing (e.g., allowing comments or trailing commas)
 except ImportError:
     json5 = None
 
+# Maximum number of Gemini evaluations in flight at once.
+MAX_CONCURRENT_REQUESTS = 16
+
+# Maximum characters of article text (HTML stripped) sent to Gemini per article.
+MAX_HTML_CHARS = 2000
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+
 def load_articles(filename):
     """Load articles from a JSON file."""
-    with open(filename, "r", encoding="utf-8") as f:
+    with open(filename, "rb") as f:
         file_content = f.read()
     try:
-        articles = json.loads(file_content)
-    except json.decoder.JSONDecodeError:
+        articles = json_utils.loads(file_content)
+    except json_utils.JSONDecodeError:
         if json5:
-            articles = json5.loads(file_content)
+            articles = json5.loads(file_content.decode("utf-8"))
         else:
             raise
     return articles
 
+def load_checkpoint(filename):
+    """Load {index: article} for articles already scored in a previous, interrupted run."""
+    done = {}
+    if not os.path.exists(filename):
+        return done
+    with open(filename, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json_utils.loads(line)
+            except json_utils.JSONDecodeError:
+                # A crash can leave a truncated final line; that article is simply rescored.
+                continue
+            done[entry["index"]] = entry["article"]
+    return done
+
+def parse_action(response_str):
+    """
+    Parse the JSON evaluation object from a Gemini response.
+    The bare response is tried first; otherwise the span from the first "{" to the
+    last "}" is parsed, which also drops markdown fences and surrounding prose.
+    """
+    try:
+        return json_utils.loads(response_str)
+    except json_utils.JSONDecodeError:
+        start = response_str.find("{")
+        end = response_str.rfind("}")
+        if start == -1 or end < start:
+            raise
+    return json_utils.loads(response_str[start:end + 1])
+
+def html_to_text(html_content, max_chars=MAX_HTML_CHARS):
+    """
+    Reduce article HTML to plain text for the prompt: strip tags, unescape entities,
+    collapse whitespace and truncate to max_chars.
+    """
+    text = html.unescape(_TAG_RE.sub(" ", html_content))
+    text = _WS_RE.sub(" ", text).strip()
+    return text[:max_chars]
+
 def state_representation(article):
     """
     Create a state representation of the article from its core features.
     """
-    state = (
-        f"Title: {article.get('title', 'N/A')}\n"
-        f"Name: {article.get('name', 'N/A')}\n"
-        f"Count: {article.get('count', 'N/A')}\n"
-        f"HTML: {article.get('html', '')}"
-    )
-    return state
+    return "\n".join([
+        f"Title: {article.get('title', 'N/A')}",
+        f"Name: {article.get('name', 'N/A')}",
+        f"Count: {article.get('count', 'N/A')}",
+        f"HTML: {html_to_text(article.get('html', ''))}",
+    ])
 
 def get_agent_prompt():
     prompt_path = Path("config/agent_prompt.txt")
@@ -74,17 +126,21 @@ def get_agent_prompt():
         Now, please provide your JSON evaluation.
         """)
 
-async def get_agent_action(state_text):
+@functools.lru_cache(maxsize=1)
+def _get_chain():
     """
-    Create a prompt with the article state text, invoke the Gemini LLM, and print the exact output.
+    Build the evaluation chain once and reuse it for every article.
     """
-    prompt_template = get_agent_prompt()
-    prompt = PromptTemplate(template=prompt_template, input_variables=["state"])
+    prompt = PromptTemplate(template=get_agent_prompt(), input_variables=["state"])
     llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
-    chain = LLMChain(llm=llm, prompt=prompt)
-    
+    return prompt | llm
+
+async def get_agent_action(state_text):
+    """
+    Invoke the Gemini evaluation chain with the article state text and print the exact output.
+    """
     # Use asynchronous invocation with proper input keys.
-    result = await chain.ainvoke({"state": state_text})
+    result = await _get_chain().ainvoke({"state": state_text})
     # Print the raw output from the Gemini API call as soon as it comes through.
     print(result)
     return result
@@ -98,7 +154,6 @@ async def run_simulation(input_file=None, output_file=None):
       - Parses the Gemini output and injects "tweet_worthiness" and "summary" into each article.
       - Writes the resulting scored articles to "data/generated_scored_articles.json".
     """
-    from datetime import date
     today_str = date.today().strftime("%Y-%m-%d")
     if input_file is None:
          input_file = f"data/raw/gdelt_articles_{today_str}.json"
@@ -115,56 +170,73 @@ async def run_simulation(input_file=None, output_file=None):
         logging.error("No articles to process. Exiting simulation.")
         return
 
-    scored_articles = []  # To store articles with evaluations.
-
-    for idx, article in enumerate(articles):
+    # Each scored article is also appended to a JSONL checkpoint alongside the output file,
+    # so progress survives a crash partway through the run.
+    partial_file = os.path.splitext(output_file)[0] + ".jsonl"
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    scored_articles = [None] * len(articles)  # To store articles with evaluations, in input order.
+    # Resume: reuse evaluations from an interrupted run instead of calling Gemini again.
+    done = load_checkpoint(partial_file)
+    for idx, article in done.items():
+        if 0 <= idx < len(articles):
+            scored_articles[idx] = article
+    if done:
+        logging.info("Resuming from %s: %d articles already scored.", partial_file, len(done))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def process(idx, article):
         state_text = state_representation(article)
-        response_text = await get_agent_action(state_text)
+        async with semaphore:
+            response_text = await get_agent_action(state_text)
+        # The chain returns an AIMessage; the model's reply is its content.
+        response_str = response_text.content.strip()
+        print(response_str)
+
+        # Only decoding can fail here; anything else is a bug and should surface.
         try:
-            response_str = ""
-            if isinstance(response_text, str):
-                response_str = response_text
-            elif isinstance(response_text, dict):
-                # Extract the 'text' field from the dict if available.
-                response_str = response_text.get("text", "")
-            else:
-                response_str = str(response_text)
-
-            response_str = response_str.strip()
-            print(response_str)
-            # If the response is wrapped in markdown fences, remove them.
-            if response_str.startswith("```"):
-                response_str = response_str.strip("`").strip()
-
-            # Use regex to extract the first JSON object from the response.
-            match = re.search(r'(\{.*\})', response_str, re.DOTALL)
-            if match:
-                json_str = match.group(1)
-            else:
-                json_str = response_str
-
-            action = json.loads(json_str)
-        except Exception as e:
+            action = parse_action(response_str)
+        except json_utils.JSONDecodeError as e:
             logging.error("Failed to parse response for article %d: %s", idx, e)
+            action = None
+        if not isinstance(action, dict):
             action = {"tweet_worthiness": 0, "summary": "Could not evaluate article."}
 
         # Inject the evaluated values into the article.
         article["tweet_worthiness"] = action.get("tweet_worthiness", 0)
         article["summary"] = action.get("summary", "No summary provided")
-        scored_articles.append(article)
+        scored_articles[idx] = article
+        partial.write(json_utils.dumps({"index": idx, "article": article}) + b"\n")
+        partial.flush()
 
         # logging.info("Article %d evaluated: tweet_worthiness=%s, summary=%s", 
         #              idx, article["tweet_worthiness"], article["summary"])
 
-    # Write the scored and summarized articles to the output file
+    # Articles are independent, so evaluate them concurrently (bounded by the semaphore).
+    with open(partial_file, "ab") as partial:
+        tasks = [
+            asyncio.ensure_future(process(idx, article))
+            for idx, article in enumerate(articles)
+            if scored_articles[idx] is None
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining evaluations before the checkpoint file is closed.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    # Write the scored and summarized articles to the output file in a single write.
     try:
-         # Ensure the directory exists.
-         os.makedirs(os.path.dirname(output_file), exist_ok=True)
-         with open(output_file, "w", encoding="utf-8") as f:
-             json.dump(scored_articles, f, ensure_ascii=False, indent=4)
+         json_utils.dump_file(scored_articles, output_file)
          logging.info("Generated scored articles saved to %s", output_file)
     except Exception as e:
          logging.error("Failed to save scored articles: %s", e)
+         return
+    # The checkpoint is only needed until the final file has been written.
+    os.remove(partial_file)
 
 if __name__ == "__main__":
     asyncio.run(run_simulation())
\ No newline at end of file
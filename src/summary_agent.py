@@ -3,118 +3,108 @@ PROJECT: News Article Summary Agent
 
 This agent loads a scored articles JSON file, filters stories with a tweet-worthiness score
 of 7 or above, removes duplicate articles based on title, and generates a summary JSON.
-For each article, it ensures that all available metadata is included and extracts the original
-story link from the HTML field (assuming the first <a> tag href is the original URL).
+For each article, it keeps all available metadata and extracts the original story link
+from the HTML field (assuming the first <a> tag href is the original URL).
 
-This agent uses the Gemini API via LangChain's ChatGoogleGenerativeAI.
-Ensure your environment is set with your GOOGLE_API_KEY.
+This is a pure data transform, so it runs locally without calling an LLM.
 """
 
 import os
-import json
-import asyncio
+import html
 import logging
 import re
 from datetime import date
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-def load_scored_articles(filename):
-    """Load scored articles from a JSON file."""
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
+from src import json_utils
+
+try:
+    import ijson  # Streaming JSON parsing for large scored files
+except ImportError:
+    ijson = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser  # C-backed HTML parsing when available
+except ImportError:
+    HTMLParser = None
+
+# Fallback for extracting the href of the first <a> tag when selectolax is not installed.
+_HREF_RE = re.compile(r'<a[^>]+href=["\']([^"\']+)', re.I)
+
+def _first_href(html_content):
+    """Return the href of the first <a> tag in the HTML, or None if there is none."""
+    if not html_content:
+        return None
+    if HTMLParser is not None:
+        node = HTMLParser(html_content).css_first("a[href]")
+        return node.attributes.get("href") if node else None
+    match = _HREF_RE.search(html_content)
+    return html.unescape(match.group(1)) if match else None
+
+def iter_scored_articles(filename, min_score=7):
+    """
+    Yield scored articles from a JSON file whose tweet_worthiness is at least min_score.
+    The file is streamed with ijson when available, so rejected articles are never kept in memory.
+    """
+    with open(filename, "rb") as f:
+        if ijson is not None:
+            articles = ijson.items(f, "item", use_float=True)
+        else:
+            articles = json_utils.loads(f.read())
+        for article in articles:
+            if article.get("tweet_worthiness", 0) >= min_score:
+                yield article
 
 def deduplicate_articles(articles):
-    """Remove duplicate articles based on title (case-insensitive)."""
-    seen = set()
-    unique_articles = []
+    """Remove duplicate articles based on title (case-insensitive); accepts any iterable."""
+    # Dicts keep insertion order, so one dict replaces the seen set plus result list; setdefault
+    # keeps the first article per normalized title.
+    unique_articles = {}
     for article in articles:
         title = article.get("title", "").strip().lower()
-        if title and title not in seen:
-            seen.add(title)
-            unique_articles.append(article)
-    return unique_articles
+        if title:
+            unique_articles.setdefault(title, article)
+    return list(unique_articles.values())
 
-async def run_summary_agent(input_file=None, output_file=None):
+def run_summary_agent(input_file=None, output_file=None):
     """
     Generate a summary JSON from scored articles:
       - Include only articles with tweet_worthiness >= 7.
       - Remove duplicate articles.
       - For each article, include all metadata and extract the first URL from the HTML as "link".
-    Uses Gemini via LangChain to produce a clean JSON output.
     """
-    today_str = date.today().strftime("%Y-%m-%d")
-    # Default input: today's scored file in data/scored folder.
-    if input_file is None:
-         input_file = f"data/scored/generated_scored_articles_{today_str}.json"
-    # Default output: summary file in data/summary folder.
-    if output_file is None:
-         output_file = f"data/summary/summary_{today_str}.json"
+    if input_file is None or output_file is None:
+         today_str = date.today().strftime("%Y-%m-%d")
+         # Default input: today's scored file in data/scored folder.
+         if input_file is None:
+              input_file = f"data/scored/generated_scored_articles_{today_str}.json"
+         # Default output: summary file in data/summary folder.
+         if output_file is None:
+              output_file = f"data/summary/summary_{today_str}.json"
     
-    if not os.path.exists(input_file):
+    # Load only articles with tweet_worthiness score >= 7 and remove duplicates based on title,
+    # in a single pass over the streamed articles. Opening the file directly (rather than
+    # checking os.path.exists first) saves a stat and cannot race with the file being removed.
+    try:
+         unique_articles = deduplicate_articles(iter_scored_articles(input_file, min_score=7))
+    except FileNotFoundError:
          logging.error("Input scored articles file %s not found.", input_file)
          return
-    
-    articles = load_scored_articles(input_file)
-    if not articles:
-         logging.error("No articles found in %s", input_file)
+    if not unique_articles:
+         logging.error("No articles with tweet_worthiness >= 7 found in %s", input_file)
          return
     
-    # Filter articles with tweet_worthiness score >= 7.
-    filtered = [a for a in articles if a.get("tweet_worthiness", 0) >= 7]
-    # Remove duplicate articles based on title.
-    unique_articles = deduplicate_articles(filtered)
-    
-    # Prepare a Gemini prompt to structure the final summary JSON.
-    prompt_template = PromptTemplate(
-         template="""You are a news summary agent using the Gemini model. Your task is to produce a clean summary JSON from the provided list of scored news articles.
-The summary JSON should include only articles with a tweet_worthiness score of 7 or higher, and duplicates (based on title) should be removed.
-For each article, include all available metadata (such as title, name, count, shareimage, html, tweet_worthiness, summary, geometry, etc.).
-Additionally, extract a valid URL from the article's HTML content (assume that the first <a> tag's href is the original story link) 
-and include it in a field called "link".
-Output ONLY the final JSON array of article objects with no additional commentary.
-Input JSON:
-{articles}
-""",
-         input_variables=["articles"]
-    )
-    
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.7)
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-    
-    articles_json = json.dumps(unique_articles, ensure_ascii=False, indent=2)
-    raw_response = await chain.ainvoke({"articles": articles_json})
-    
-    try:
-         # Process Gemini output.
-         if isinstance(raw_response, dict):
-              response_str = raw_response.get("text", "")
-         else:
-              response_str = str(raw_response)
-         response_str = response_str.strip()
-         # Remove markdown code fences if present.
-         if response_str.startswith("```"):
-              response_str = response_str.strip("`").strip()
-         # Use regex to extract JSON array.
-         match = re.search(r'(\[.*\])', response_str, re.DOTALL)
-         if match:
-              json_str = match.group(1)
-         else:
-              json_str = response_str
-         summary_articles = json.loads(json_str)
-    except Exception as e:
-         logging.error("Failed to parse Gemini response: %s", e)
-         summary_articles = unique_articles  # fallback
+    # Extract the original story link from each article's HTML, keeping all other metadata.
+    summary_articles = [
+         {**article, "link": _first_href(article.get("html", ""))} for article in unique_articles
+    ]
     
     # Save the summary JSON.
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
     try:
-         with open(output_file, "w", encoding="utf-8") as f:
-              json.dump(summary_articles, f, ensure_ascii=False, indent=4)
+         json_utils.dump_file(summary_articles, output_file)
          logging.info("Summary JSON saved to %s", output_file)
     except Exception as e:
          logging.error("Failed to save summary JSON: %s", e)
 
 if __name__ == "__main__":
-    asyncio.run(run_summary_agent()) 
\ No newline at end of file
+    run_summary_agent()
@@ -1,5 +1,6 @@
 import os
 import json
+import functools
 import requests
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -10,6 +11,7 @@ load_dotenv()
 # Endpoints and API keys from environment variables
 GDELT_ENDPOINT = os.getenv("GDELT_API_URL", "http://api.gdeltproject.org/api/v2/doc/doc")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_MODEL = "gemini-1.5-flash"
 
 if not GOOGLE_API_KEY:
     print("Error: GOOGLE_API_KEY not found in environment variables.")
@@ -18,6 +20,11 @@ if not GOOGLE_API_KEY:
 # Configure the Gemini API with the provided API key
 genai.configure(api_key=GOOGLE_API_KEY)
 
+@functools.lru_cache(maxsize=None)
+def _model(name=GEMINI_MODEL):
+    """Return a shared Gemini model instance so repeated calls skip client setup."""
+    return genai.GenerativeModel(name)
+
 def test_gdelt_fetch():
     """
     Fetch a sample of news articles from the GDELT API.
@@ -48,9 +55,9 @@ def test_gdelt_fetch():
                 if headlines:
                     summary = "Headlines: " + "; ".join(headlines)
                 else:
-                    summary = "Fetched data: " + json.dumps(data)
+                    summary = "Fetched data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":"))
             else:
-                summary = "Fetched data: " + json.dumps(data)
+                summary = "Fetched data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":"))
             return summary
         else:
             print("GDELT API request failed with status code:", response.status_code)
@@ -64,8 +71,8 @@ def test_gemini_prompt(gdelt_context):
     Test the Gemini API by generating content using a prompt that includes GDELT data.
     """
     try:
-        # Initialize Gemini model and send a prompt that includes GDELT data
-        model = genai.GenerativeModel("gemini-1.5-flash")
+        # Get the shared Gemini model and send a prompt that includes GDELT data
+        model = _model()
         prompt = (
             f"Based on the following news data: '{gdelt_context}', "
             "craft a well-structured, engaging short story of about 300 words. The narrative should "
@@ -86,4 +93,4 @@ if __name__ == "__main__":
     gdelt_data = test_gdelt_fetch()
     print("-" * 50)
     test_gemini_prompt(gdelt_data)
-    print("-" * 50)
\ No newline at end of file
+    print("-" * 50)